@@ -18,6 +18,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Upper bound on LMNT speech requests in flight per narration
+MAX_CONCURRENT_TTS = 16
+
 
 class LMNTVoiceConfig(BaseModel):
     """LMNT voice configuration"""
@@ -244,25 +247,30 @@ class LMNTNarratorAgent(Agent):
     async def _generate_audio_segments(self, segments: List[AudioSegment], voice_config: LMNTVoiceConfig) -> List[AudioSegment]:
         """Generate audio for each segment using LMNT API"""
         
-        async with aiohttp.ClientSession() as session:
-            audio_segments = []
-            
-            for segment in segments:
-                if segment.text == "[pause]":
-                    # Generate silence
-                    segment.audio_data = self._generate_silence(segment.duration)
-                else:
-                    # Generate speech via LMNT
+        # Segments are independent, so synthesize them concurrently over one session
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_TTS)
+        
+        async def generate(session: aiohttp.ClientSession, segment: AudioSegment) -> AudioSegment:
+            if segment.text == "[pause]":
+                # Generate silence
+                segment.audio_data = self._generate_silence(segment.duration)
+            else:
+                # Generate speech via LMNT
+                async with semaphore:
                     audio_data = await self._call_lmnt_api(session, segment.text, voice_config)
-                    segment.audio_data = audio_data
-                    
-                    # Update duration based on actual audio
-                    if audio_data:
-                        segment.duration = self._calculate_audio_duration(audio_data)
+                segment.audio_data = audio_data
                 
-                audio_segments.append(segment)
+                # Update duration based on actual audio
+                if audio_data:
+                    segment.duration = self._calculate_audio_duration(audio_data)
+            
+            return segment
+        
+        async with aiohttp.ClientSession() as session:
+            # gather keeps the segments in transcript order
+            audio_segments = await asyncio.gather(*(generate(session, segment) for segment in segments))
         
-        return audio_segments
+        return list(audio_segments)
     
     async def _call_lmnt_api(self, session: aiohttp.ClientSession, text: str, voice_config: LMNTVoiceConfig) -> bytes:
         """Call LMNT API for text-to-speech"""
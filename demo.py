@@ -72,25 +72,28 @@ async def demo_sponsor_integrations():
     
     integration = EnhancedSponsorIntegration()
     
-    print("Testing sponsor integrations...")
-    
-    # Test Anthropic Claude
-    print_status("Anthropic Claude: Content analysis and generation")
-    
-    # Test Groq
-    print_status("Groq: Ultra-fast inference and quiz generation")
-    result = await integration.groq.fast_content_analysis(DEMO_CONTENT[:500])
-    print(f"   📊 Groq Analysis: {len(result)} data points extracted")
-    
-    # Test interactive elements
-    print_status("Generating interactive quiz questions...")
-    quiz = await integration.groq.generate_quiz_questions(DEMO_CONTENT, 3)
-    print(f"   ❓ Generated {len(quiz)} quiz questions")
-    
-    # Test Fetch.ai integration
-    print_status("Fetch.ai: Decentralized knowledge sharing")
-    
-    print("\n🎯 All sponsor technologies integrated successfully!")
+    try:
+        print("Testing sponsor integrations...")
+        
+        # Test Anthropic Claude
+        print_status("Anthropic Claude: Content analysis and generation")
+        
+        # Test Groq
+        print_status("Groq: Ultra-fast inference and quiz generation")
+        result = await integration.groq.fast_content_analysis(DEMO_CONTENT[:500])
+        print(f"   📊 Groq Analysis: {len(result)} data points extracted")
+        
+        # Test interactive elements
+        print_status("Generating interactive quiz questions...")
+        quiz = await integration.groq.generate_quiz_questions(DEMO_CONTENT, 3)
+        print(f"   ❓ Generated {len(quiz)} quiz questions")
+        
+        # Test Fetch.ai integration
+        print_status("Fetch.ai: Decentralized knowledge sharing")
+        
+        print("\n🎯 All sponsor technologies integrated successfully!")
+    finally:
+        await integration.aclose()
 
 
 async def demo_video_generation():
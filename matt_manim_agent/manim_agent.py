@@ -7,7 +7,7 @@ from pathlib import Path
 import json
 
 from crewai import Agent, Task, Crew
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
@@ -16,6 +16,8 @@ load_dotenv()
 
 class ManimOutput(BaseModel):
     """Structured output from Manim Agent"""
+    model_config = ConfigDict(frozen=True)
+
     success: bool = Field(description="Whether the animation was successfully created")
     video_path: Optional[str] = Field(default=None, description="Path to the generated MP4 file")
     duration: Optional[float] = Field(default=None, description="Duration of the video in seconds")
@@ -328,9 +330,9 @@ class ManimAgent(Agent):
 
 
 # Convenience function for standalone usage
-async def create_animation(concept: str, **context) -> ManimOutput:
-    """Create animation with minimal setup"""
-    core = ManimAgentCore()
+async def create_animation(concept: str, _core: Optional[ManimAgentCore] = None, **context) -> ManimOutput:
+    """Create animation with minimal setup (pass ``_core`` to reuse an existing core)"""
+    core = _core if _core is not None else ManimAgentCore()
     task_context = {"concept": concept, **context}
     return await core.process_animation_task(task_context)
 
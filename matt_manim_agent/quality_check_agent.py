@@ -12,7 +12,7 @@ from io import BytesIO
 import tempfile
 
 from crewai import Agent, Task, Crew
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from dotenv import load_dotenv
 from openai import OpenAI
 
@@ -38,6 +38,8 @@ class AestheticIssue(BaseModel):
 
 class QualityReport(BaseModel):
     """Complete quality analysis report for an animation"""
+    model_config = ConfigDict(frozen=True)
+
     video_path: str = Field(description="Path to the analyzed video")
     overall_quality: str = Field(description="Overall quality: excellent, good, acceptable, poor")
     technical_metrics: Dict[str, Any] = Field(description="Technical metrics: duration, resolution, fps, etc.")
@@ -464,9 +466,9 @@ If no issues: "No aesthetic issues detected"
 
 
 # Convenience function for standalone usage
-async def check_animation_quality(video_path: str) -> QualityReport:
-    """Check quality of an animation with minimal setup"""
-    agent = QualityCheckAgent()
+async def check_animation_quality(video_path: str, _agent: Optional[QualityCheckAgent] = None) -> QualityReport:
+    """Check quality of an animation with minimal setup (pass ``_agent`` to reuse an existing agent)"""
+    agent = _agent if _agent is not None else QualityCheckAgent()
     return await agent.analyze_animation(video_path)
 
 
@@ -3,6 +3,7 @@ Pytest configuration and shared fixtures
 """
 
 import pytest
+from pytest_asyncio import is_async_test
 import os
 import tempfile
 import asyncio
@@ -15,6 +16,14 @@ import numpy as np
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+try:
+    import uvloop
+    HAS_UVLOOP = sys.platform != "win32"
+except ImportError:
+    HAS_UVLOOP = False
+
+import manim_agent
+import quality_check_agent
 from manim_agent import ManimAgentCore, ManimOutput
 from quality_check_agent import QualityCheckAgent, QualityReport, QualityIssue, AestheticIssue
 
@@ -40,10 +49,8 @@ class TestScene(Scene):
 '''
 
 
-@pytest.fixture
-def sample_video_frame():
-    """Create a sample video frame for testing"""
-    # Create a simple 720p frame with some content
+def _draw_sample_frame():
+    """Draw a 720p frame with axes, a shape and text-like regions"""
     frame = np.zeros((720, 1280, 3), dtype=np.uint8)
     
     # Add some geometric shapes to simulate math content
@@ -59,16 +66,21 @@ def sample_video_frame():
 
 
 @pytest.fixture
-def sample_video_frames(sample_video_frame):
-    """Create multiple sample frames"""
-    frames = []
-    for i in range(5):
-        # Create variations of the base frame
-        frame = sample_video_frame.copy()
+def sample_video_frame():
+    """Create a sample video frame for testing"""
+    return _draw_sample_frame()
+
+
+@pytest.fixture(scope="session")
+def sample_video_frames():
+    """Create multiple read-only sample frames, shared across the session"""
+    frames = np.stack([_draw_sample_frame() for _ in range(5)])
+    for i, frame in enumerate(frames):
         # Add frame number
         cv2.putText(frame, f"Frame {i+1}", (50, 650), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        frames.append(frame)
-    return frames
+    frames.setflags(write=False)
+    # Views into one contiguous block
+    return list(frames)
 
 
 @pytest.fixture
@@ -106,6 +118,70 @@ def mock_quality_agent():
     return agent
 
 
+@pytest.fixture(scope="session")
+def manim_core():
+    """One ManimAgentCore shared by tests that don't assert on construction"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("ANTHROPIC_API_KEY", "test_anthropic_key")
+        return ManimAgentCore()
+
+
+@pytest.fixture(scope="session")
+def quality_agent():
+    """One QualityCheckAgent shared by tests that don't assert on construction"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("OPENAI_API_KEY", "test_openai_key")
+        return QualityCheckAgent()
+
+
+@pytest.fixture(scope="session")
+def shared_mock_agents():
+    """Stub generation/quality agents built once per session for ``_core``/``_agent`` injection"""
+    manim_core = MagicMock(spec=["process_animation_task"])
+    manim_core.process_animation_task = AsyncMock()
+
+    quality_agent = MagicMock(spec=["analyze_animation"])
+    quality_agent.analyze_animation = AsyncMock()
+
+    return manim_core, quality_agent
+
+
+@pytest.fixture
+def mock_agents(shared_mock_agents):
+    """Shared stub agents with results and call history cleared for each test"""
+    for agent in shared_mock_agents:
+        agent.reset_mock(return_value=True, side_effect=True)
+    return shared_mock_agents
+
+
+@pytest.fixture
+def patched_manim_core(monkeypatch):
+    """Replace the ManimAgentCore class used by create_animation with a mock"""
+    manim_class = MagicMock()
+    manim_class.return_value.process_animation_task = AsyncMock()
+    monkeypatch.setattr(manim_agent, "ManimAgentCore", manim_class)
+    return manim_class
+
+
+@pytest.fixture
+def patched_quality_agent(monkeypatch):
+    """Replace the QualityCheckAgent class used by check_animation_quality with a mock"""
+    quality_class = MagicMock()
+    quality_class.return_value.analyze_animation = AsyncMock()
+    monkeypatch.setattr(quality_check_agent, "QualityCheckAgent", quality_class)
+    return quality_class
+
+
+@pytest.fixture
+def mock_subprocess_run(monkeypatch):
+    """Replace subprocess.run, as called by the agent modules, with a mock"""
+    run = MagicMock()
+    # manim_agent and quality_check_agent both do ``import subprocess``, so
+    # they share this one module attribute
+    monkeypatch.setattr(manim_agent.subprocess, "run", run)
+    return run
+
+
 @pytest.fixture
 def sample_quality_report():
     """Create a sample quality report"""
@@ -152,12 +228,7 @@ def sample_aesthetic_issues():
     ]
 
 
-@pytest.fixture
-def mock_anthropic_response():
-    """Mock Anthropic API response"""
-    mock_response = MagicMock()
-    mock_response.content = [MagicMock()]
-    mock_response.content[0].text = '''
+ANTHROPIC_RESPONSE_TEXT = '''
 from manim import *
 
 class GeneratedScene(Scene):
@@ -166,26 +237,56 @@ class GeneratedScene(Scene):
         self.play(Create(title))
         self.wait(2)
 '''
+
+OPENAI_RESPONSE_TEXT = "title - overlaps with graph - move down 2 units"
+
+
+@pytest.fixture(scope="session")
+def _anthropic_response():
+    """Mock Anthropic API response tree, built once per session"""
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock()]
     return mock_response
 
 
 @pytest.fixture
-def mock_openai_response():
-    """Mock OpenAI API response"""
+def mock_anthropic_response(_anthropic_response):
+    """Mock Anthropic API response with its text reset for each test"""
+    _anthropic_response.content[0].text = ANTHROPIC_RESPONSE_TEXT
+    return _anthropic_response
+
+
+@pytest.fixture(scope="session")
+def _openai_response():
+    """Mock OpenAI API response tree, built once per session"""
     mock_response = MagicMock()
     mock_response.choices = [MagicMock()]
     mock_response.choices[0].message = MagicMock()
-    mock_response.choices[0].message.content = "title - overlaps with graph - move down 2 units"
     return mock_response
 
 
-# Event loop fixture for async tests
+@pytest.fixture
+def mock_openai_response(_openai_response):
+    """Mock OpenAI API response with its message content reset for each test"""
+    _openai_response.choices[0].message.content = OPENAI_RESPONSE_TEXT
+    return _openai_response
+
+
+# Event loop fixtures for async tests
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Use uvloop for async tests when it is installed"""
+    if HAS_UVLOOP:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+def pytest_collection_modifyitems(items):
+    """Run every async test on the single session-scoped event loop"""
+    session_scope_marker = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_scope_marker, append=False)
 
 
 # Environment setup
@@ -5,9 +5,9 @@ Tests the complete pipeline: Generation → Quality Check
 
 import pytest
 import asyncio
-from unittest.mock import patch, AsyncMock, MagicMock
 import tempfile
 import os
+from unittest.mock import MagicMock
 
 from manim_agent import create_animation, ManimOutput
 from quality_check_agent import check_animation_quality, QualityReport
@@ -16,8 +16,7 @@ from quality_check_agent import check_animation_quality, QualityReport
 class TestTwoAgentWorkflow:
     """Test the complete two-agent system workflow"""
     
-    @pytest.mark.asyncio
-    async def test_successful_generation_and_analysis(self):
+    async def test_successful_generation_and_analysis(self, mock_agents):
         """Test successful generation followed by quality analysis"""
         
         # Mock generation result
@@ -45,35 +44,28 @@ class TestTwoAgentWorkflow:
             score=85.0
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            # Setup mocks
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=mock_generation_result)
-            
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            mock_quality.analyze_animation = AsyncMock(return_value=mock_quality_report)
-            
-            # Test the workflow
-            # Step 1: Generate animation
-            generation_result = await create_animation("sine wave")
-            
-            assert generation_result.success is True
-            assert generation_result.concept == "sine wave"
-            assert generation_result.video_path == "/tmp/test_animation.mp4"
-            
-            # Step 2: Analyze quality
-            quality_result = await check_animation_quality(generation_result.video_path)
-            
-            assert isinstance(quality_result, QualityReport)
-            assert quality_result.score == 85.0
-            assert quality_result.overall_quality == "good"
-            assert quality_result.video_path == generation_result.video_path
+        # Configure shared stub agents
+        mock_manim, mock_quality = mock_agents
+        mock_manim.process_animation_task.return_value = mock_generation_result
+        
+        mock_quality.analyze_animation.return_value = mock_quality_report
+        
+        # Test the workflow
+        # Step 1: Generate animation
+        generation_result = await create_animation("sine wave", _core=mock_manim)
+        
+        assert generation_result.success is True
+        assert generation_result.concept == "sine wave"
+        assert generation_result.video_path == "/tmp/test_animation.mp4"
+        
+        # Step 2: Analyze quality
+        quality_result = await check_animation_quality(generation_result.video_path, _agent=mock_quality)
+        
+        assert isinstance(quality_result, QualityReport)
+        assert quality_result.score == 85.0
+        assert quality_result.overall_quality == "good"
+        assert quality_result.video_path == generation_result.video_path
     
-    @pytest.mark.asyncio
     async def test_generation_failure_workflow(self):
         """Test workflow when generation fails"""
         
@@ -83,23 +75,25 @@ class TestTwoAgentWorkflow:
             error="Failed to generate Manim code"
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class:
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=mock_generation_result)
-            
-            # Test generation failure
-            result = await create_animation("invalid concept")
-            
-            assert result.success is False
-            assert result.error is not None
-            assert result.video_path is None
-            
-            # Should not proceed to quality check
-            # (In real workflow, user would check success before proceeding)
+        # The failure is known up front, so hand back an already-resolved
+        # future instead of going through AsyncMock's coroutine machinery
+        resolved = asyncio.get_running_loop().create_future()
+        resolved.set_result(mock_generation_result)
+        
+        mock_manim = MagicMock(spec=["process_animation_task"])
+        mock_manim.process_animation_task = MagicMock(return_value=resolved)
+        
+        # Test generation failure
+        result = await create_animation("invalid concept", _core=mock_manim)
+        
+        assert result.success is False
+        assert result.error is not None
+        assert result.video_path is None
+        
+        # Should not proceed to quality check
+        # (In real workflow, user would check success before proceeding)
     
-    @pytest.mark.asyncio
-    async def test_quality_analysis_finds_issues(self):
+    async def test_quality_analysis_finds_issues(self, mock_agents):
         """Test workflow when quality analysis finds issues"""
         
         # Mock generation with successful result
@@ -141,34 +135,28 @@ class TestTwoAgentWorkflow:
             score=65.0
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            # Setup mocks
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=mock_generation_result)
-            
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            mock_quality.analyze_animation = AsyncMock(return_value=mock_quality_report)
-            
-            # Test workflow with issues
-            generation_result = await create_animation("complex plot")
-            assert generation_result.success is True
-            
-            quality_result = await check_animation_quality(generation_result.video_path)
-            
-            assert quality_result.score == 65.0
-            assert quality_result.overall_quality == "acceptable"
-            assert len(quality_result.issues) == 2
-            
-            # Check specific issues
-            assert any("overlaps with graph" in str(issue) for issue in quality_result.issues)
-            assert any("too close to axis" in str(issue) for issue in quality_result.issues)
+        # Configure shared stub agents
+        mock_manim, mock_quality = mock_agents
+        mock_manim.process_animation_task.return_value = mock_generation_result
+        
+        mock_quality.analyze_animation.return_value = mock_quality_report
+        
+        # Test workflow with issues
+        generation_result = await create_animation("complex plot", _core=mock_manim)
+        assert generation_result.success is True
+        
+        quality_result = await check_animation_quality(generation_result.video_path, _agent=mock_quality)
+        
+        assert quality_result.score == 65.0
+        assert quality_result.overall_quality == "acceptable"
+        assert len(quality_result.issues) == 2
+        
+        # Check specific issues
+        issue_strs = [str(issue) for issue in quality_result.issues]
+        assert any("overlaps with graph" in s for s in issue_strs)
+        assert any("too close to axis" in s for s in issue_strs)
     
-    @pytest.mark.asyncio
-    async def test_iterative_improvement_workflow(self):
+    async def test_iterative_improvement_workflow(self, mock_agents):
         """Test iterative improvement workflow"""
         
         # Simulate first generation with issues
@@ -205,169 +193,142 @@ class TestTwoAgentWorkflow:
             score=85.0
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            
-            # First iteration
-            mock_manim.process_animation_task = AsyncMock(return_value=first_result)
-            mock_quality.analyze_animation = AsyncMock(return_value=first_quality)
-            
-            result1 = await create_animation("quadratic function")
-            quality1 = await check_animation_quality(result1.video_path)
-            
-            assert result1.success is True
-            assert quality1.score == 45.0  # Poor quality
-            
-            # Second iteration (with improvements)
-            mock_manim.process_animation_task = AsyncMock(return_value=second_result)
-            mock_quality.analyze_animation = AsyncMock(return_value=second_quality)
-            
-            # In real workflow, you'd modify the generation parameters based on feedback
-            result2 = await create_animation(
-                "quadratic function",
-                style_direction={"title_position": "lower", "spacing": "generous"}
-            )
-            quality2 = await check_animation_quality(result2.video_path)
-            
-            assert result2.success is True
-            assert quality2.score == 85.0  # Improved quality
-            assert len(quality2.issues) == 0
+        mock_manim, mock_quality = mock_agents
+        
+        # First iteration
+        mock_manim.process_animation_task.return_value = first_result
+        mock_quality.analyze_animation.return_value = first_quality
+        
+        result1 = await create_animation("quadratic function", _core=mock_manim)
+        quality1 = await check_animation_quality(result1.video_path, _agent=mock_quality)
+        
+        assert result1.success is True
+        assert quality1.score == 45.0  # Poor quality
+        
+        # Second iteration (with improvements)
+        mock_manim.process_animation_task.return_value = second_result
+        mock_quality.analyze_animation.return_value = second_quality
+        
+        # In real workflow, you'd modify the generation parameters based on feedback
+        result2 = await create_animation(
+            "quadratic function",
+            _core=mock_manim,
+            style_direction={"title_position": "lower", "spacing": "generous"}
+        )
+        quality2 = await check_animation_quality(result2.video_path, _agent=mock_quality)
+        
+        assert result2.success is True
+        assert quality2.score == 85.0  # Improved quality
+        assert len(quality2.issues) == 0
     
-    @pytest.mark.asyncio
-    async def test_batch_processing_workflow(self):
+    async def test_batch_processing_workflow(self, mock_agents):
         """Test batch processing multiple animations"""
         
         concepts = ["sine wave", "cosine wave", "tangent function"]
-        results = []
+        paths = [f"/tmp/{concept.replace(' ', '_')}.mp4" for concept in concepts]
+        gens, qualities = [], []
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            # Setup mocks for batch processing
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            
-            # Mock different results for each concept
-            generation_results = [
-                ManimOutput(success=True, video_path=f"/tmp/{concept.replace(' ', '_')}.mp4", concept=concept)
-                for concept in concepts
-            ]
-            
-            quality_results = [
-                QualityReport(
-                    video_path=f"/tmp/{concept.replace(' ', '_')}.mp4",
-                    overall_quality="good",
-                    technical_metrics={},
-                    issues=[],
-                    recommendations=[],
-                    score=80.0 + i * 5  # Varying scores
-                )
-                for i, concept in enumerate(concepts)
-            ]
-            
-            mock_manim.process_animation_task = AsyncMock(side_effect=generation_results)
-            mock_quality.analyze_animation = AsyncMock(side_effect=quality_results)
-            
-            # Process batch
-            for i, concept in enumerate(concepts):
-                # Generate
-                gen_result = await create_animation(concept)
-                assert gen_result.success is True
-                
-                # Analyze quality
-                quality_result = await check_animation_quality(gen_result.video_path)
-                
-                results.append({
-                    'concept': concept,
-                    'generation': gen_result,
-                    'quality': quality_result
-                })
+        # Configure shared stub agents for batch processing
+        mock_manim, mock_quality = mock_agents
+        
+        # Mock different results for each concept
+        generation_results = [
+            ManimOutput(success=True, video_path=path, concept=concept)
+            for concept, path in zip(concepts, paths)
+        ]
+        
+        quality_results = [
+            QualityReport(
+                video_path=path,
+                overall_quality="good",
+                technical_metrics={},
+                issues=[],
+                recommendations=[],
+                score=80.0 + i * 5  # Varying scores
+            )
+            for i, path in enumerate(paths)
+        ]
+        
+        mock_manim.process_animation_task.side_effect = generation_results
+        mock_quality.analyze_animation.side_effect = quality_results
+        
+        # Process batch
+        for concept in concepts:
+            # Generate
+            gen_result = await create_animation(concept, _core=mock_manim)
+            assert gen_result.success is True
             
-            # Verify batch results
-            assert len(results) == 3
-            assert all(r['generation'].success for r in results)
-            assert all(r['quality'].score >= 80.0 for r in results)
+            # Analyze quality
+            quality_result = await check_animation_quality(gen_result.video_path, _agent=mock_quality)
             
-            # Check that scores vary as expected
-            scores = [r['quality'].score for r in results]
-            assert scores == [80.0, 85.0, 90.0]
+            gens.append(gen_result)
+            qualities.append(quality_result)
+        
+        # Verify batch results
+        assert len(gens) == len(qualities) == 3
+        assert all(g.success for g in gens)
+        
+        # Check that scores vary as expected
+        scores = [q.score for q in qualities]
+        assert all(score >= 80.0 for score in scores)
+        assert scores == [80.0, 85.0, 90.0]
 
 
 class TestWorkflowTiming:
     """Test timing and performance aspects of the workflow"""
     
-    @pytest.mark.asyncio
-    async def test_workflow_performance(self):
+    async def test_workflow_performance(self, mock_agents):
         """Test that workflow completes within reasonable time"""
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            # Setup fast mocks
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=ManimOutput(
-                success=True,
-                video_path="/tmp/test.mp4",
-                concept="test"
-            ))
-            
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            mock_quality.analyze_animation = AsyncMock(return_value=QualityReport(
-                video_path="/tmp/test.mp4",
-                overall_quality="good",
-                technical_metrics={},
-                issues=[],
-                recommendations=[],
-                score=85.0
-            ))
-            
-            start_time = asyncio.get_event_loop().time()
-            
-            # Run workflow
-            result = await create_animation("performance test")
-            quality = await check_animation_quality(result.video_path)
-            
-            end_time = asyncio.get_event_loop().time()
-            total_time = end_time - start_time
-            
-            # Should complete very quickly with mocks (< 1 second)
-            assert total_time < 1.0
-            assert result.success is True
-            assert quality.score == 85.0
+        # Configure fast stub agents
+        mock_manim, mock_quality = mock_agents
+        mock_manim.process_animation_task.return_value = ManimOutput(
+            success=True,
+            video_path="/tmp/test.mp4",
+            concept="test"
+        )
+        
+        mock_quality.analyze_animation.return_value = QualityReport(
+            video_path="/tmp/test.mp4",
+            overall_quality="good",
+            technical_metrics={},
+            issues=[],
+            recommendations=[],
+            score=85.0
+        )
+        
+        start_time = asyncio.get_event_loop().time()
+        
+        # Run workflow
+        result = await create_animation("performance test", _core=mock_manim)
+        quality = await check_animation_quality(result.video_path, _agent=mock_quality)
+        
+        end_time = asyncio.get_event_loop().time()
+        total_time = end_time - start_time
+        
+        # Should complete very quickly with mocks (< 1 second)
+        assert total_time < 1.0
+        assert result.success is True
+        assert quality.score == 85.0
 
 
 class TestWorkflowErrorHandling:
     """Test error handling in the complete workflow"""
     
-    @pytest.mark.asyncio
-    async def test_api_failure_handling(self):
+    async def test_api_failure_handling(self, mock_agents):
         """Test workflow behavior when APIs fail"""
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class:
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            
-            # Simulate API failure
-            mock_manim.process_animation_task = AsyncMock(side_effect=Exception("API connection failed"))
-            
-            with pytest.raises(Exception) as exc_info:
-                await create_animation("test concept")
-            
-            assert "API connection failed" in str(exc_info.value)
+        mock_manim, _ = mock_agents
+        
+        # Simulate API failure
+        mock_manim.process_animation_task.side_effect = Exception("API connection failed")
+        
+        with pytest.raises(Exception) as exc_info:
+            await create_animation("test concept", _core=mock_manim)
+        
+        assert "API connection failed" in str(exc_info.value)
     
-    @pytest.mark.asyncio
-    async def test_partial_workflow_failure(self):
+    async def test_partial_workflow_failure(self, mock_agents):
         """Test when generation succeeds but quality check fails"""
         
         successful_generation = ManimOutput(
@@ -376,35 +337,28 @@ class TestWorkflowErrorHandling:
             concept="test"
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            # Generation succeeds
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=successful_generation)
-            
-            # Quality check fails
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            mock_quality.analyze_animation = AsyncMock(side_effect=Exception("Quality analysis failed"))
-            
-            # Generation should succeed
-            result = await create_animation("test")
-            assert result.success is True
-            
-            # Quality check should fail
-            with pytest.raises(Exception) as exc_info:
-                await check_animation_quality(result.video_path)
-            
-            assert "Quality analysis failed" in str(exc_info.value)
+        # Generation succeeds
+        mock_manim, mock_quality = mock_agents
+        mock_manim.process_animation_task.return_value = successful_generation
+        
+        # Quality check fails
+        mock_quality.analyze_animation.side_effect = Exception("Quality analysis failed")
+        
+        # Generation should succeed
+        result = await create_animation("test", _core=mock_manim)
+        assert result.success is True
+        
+        # Quality check should fail
+        with pytest.raises(Exception) as exc_info:
+            await check_animation_quality(result.video_path, _agent=mock_quality)
+        
+        assert "Quality analysis failed" in str(exc_info.value)
 
 
 class TestWorkflowDataFlow:
     """Test data flow between agents"""
     
-    @pytest.mark.asyncio
-    async def test_context_preservation(self):
+    async def test_context_preservation(self, mock_agents):
         """Test that context is preserved through the workflow"""
         
         input_context = {
@@ -422,27 +376,24 @@ class TestWorkflowDataFlow:
             visual_elements=["title", "axes", "real_part", "imaginary_part"]
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class:
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=expected_output)
-            
-            result = await create_animation(**input_context)
-            
-            # Verify context was passed correctly
-            call_args = mock_manim.process_animation_task.call_args[0][0]
-            
-            assert call_args["concept"] == input_context["concept"]
-            assert call_args["script_context"] == input_context["script_context"]
-            assert call_args["duration"] == input_context["duration"]
-            assert call_args["style_direction"] == input_context["style_direction"]
-            
-            # Verify output preserves context
-            assert result.concept == input_context["concept"]
-            assert result.duration == input_context["duration"]
+        mock_manim, _ = mock_agents
+        mock_manim.process_animation_task.return_value = expected_output
+        
+        result = await create_animation(_core=mock_manim, **input_context)
+        
+        # Verify context was passed correctly
+        call_args = mock_manim.process_animation_task.call_args[0][0]
+        
+        assert call_args["concept"] == input_context["concept"]
+        assert call_args["script_context"] == input_context["script_context"]
+        assert call_args["duration"] == input_context["duration"]
+        assert call_args["style_direction"] == input_context["style_direction"]
+        
+        # Verify output preserves context
+        assert result.concept == input_context["concept"]
+        assert result.duration == input_context["duration"]
     
-    @pytest.mark.asyncio
-    async def test_metadata_flow(self):
+    async def test_metadata_flow(self, mock_agents):
         """Test that metadata flows correctly between agents"""
         
         generation_output = ManimOutput(
@@ -469,26 +420,20 @@ class TestWorkflowDataFlow:
             score=95.0
         )
         
-        with patch('manim_agent.ManimAgentCore') as mock_manim_class, \
-             patch('quality_check_agent.QualityCheckAgent') as mock_quality_class:
-            
-            mock_manim = MagicMock()
-            mock_manim_class.return_value = mock_manim
-            mock_manim.process_animation_task = AsyncMock(return_value=generation_output)
-            
-            mock_quality = MagicMock()
-            mock_quality_class.return_value = mock_quality
-            mock_quality.analyze_animation = AsyncMock(return_value=quality_report)
-            
-            # Test data flow
-            gen_result = await create_animation("metadata test")
-            quality_result = await check_animation_quality(gen_result.video_path)
-            
-            # Verify metadata preservation
-            assert gen_result.metadata["render_time"] == 12.5
-            assert gen_result.metadata["complexity"] == "medium"
-            assert len(gen_result.visual_elements) == 3
-            
-            # Verify technical metrics match
-            assert quality_result.technical_metrics["duration"] == gen_result.duration
-            assert quality_result.video_path == gen_result.video_path
\ No newline at end of file
+        mock_manim, mock_quality = mock_agents
+        mock_manim.process_animation_task.return_value = generation_output
+        
+        mock_quality.analyze_animation.return_value = quality_report
+        
+        # Test data flow
+        gen_result = await create_animation("metadata test", _core=mock_manim)
+        quality_result = await check_animation_quality(gen_result.video_path, _agent=mock_quality)
+        
+        # Verify metadata preservation
+        assert gen_result.metadata["render_time"] == 12.5
+        assert gen_result.metadata["complexity"] == "medium"
+        assert len(gen_result.visual_elements) == 3
+        
+        # Verify technical metrics match
+        assert quality_result.technical_metrics["duration"] == gen_result.duration
+        assert quality_result.video_path == gen_result.video_path
\ No newline at end of file
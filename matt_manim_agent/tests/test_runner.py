@@ -7,73 +7,199 @@ Runs all tests and provides detailed reporting
 import pytest
 import sys
 import os
+import re
 import time
 import subprocess
 from pathlib import Path
+from collections import deque
 import json
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import xdist  # noqa: F401  (pytest-xdist)
+    HAS_XDIST = True
+except ImportError:
+    HAS_XDIST = False
+
+TESTS_DIR = Path(__file__).parent
+AGENT_DIR = TESTS_DIR.parent
+
+# pytest already streams progress to the terminal, so captured output only
+# needs the tail for results/reports
+MAX_CAPTURED_LINES = 200
+
+# "-rA" short summary lines, e.g. "FAILED tests/unit/test_x.py::test_y - msg"
+_SUMMARY_LINE_RE = re.compile(r"^(PASSED|FAILED|ERROR|XFAIL|XPASS) (\S+)", re.MULTILINE)
+
+
+class _TailBuffer:
+    """Text sink that keeps only the last lines written to it"""
+    
+    def __init__(self, maxlen=MAX_CAPTURED_LINES):
+        self.lines = deque(maxlen=maxlen)
+    
+    def write(self, text):
+        self.lines.extend(text.splitlines(keepends=True))
+    
+    def getvalue(self):
+        return "".join(self.lines)
+
+
+class _CaptureReporter:
+    """pytest plugin that records outcomes and failures of an in-process run"""
+    
+    def __init__(self):
+        self.stdout = _TailBuffer()
+        self.stderr = _TailBuffer()
+    
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call" or not report.passed:
+            self.stdout.write(f"{report.nodeid} {report.outcome.upper()}\n")
+        if report.failed:
+            self.stderr.write(f"{report.nodeid} ({report.when})\n{report.longreprtext}\n")
+    
+    def pytest_terminal_summary(self, terminalreporter):
+        counts = {
+            outcome: len(terminalreporter.stats.get(outcome, []))
+            for outcome in ("passed", "failed", "error", "skipped")
+        }
+        summary = ", ".join(f"{n} {outcome}" for outcome, n in counts.items() if n)
+        self.stdout.write(f"{summary or 'no tests ran'}\n")
+    
+    def record_process(self, proc):
+        """Record the output of a pytest run made in a subprocess"""
+        self.stdout.write(proc.stdout)
+        self.stderr.write(proc.stderr)
+
+
+class _SuiteTimingPlugin:
+    """pytest plugin that splits outcomes and durations of one session by suite"""
+    
+    def __init__(self, suite_dirs):
+        # suite_dirs maps a directory under tests/ (e.g. "unit") to its suite name
+        self.suite_dirs = suite_dirs
+        self.suites = {
+            name: {"failed": False, "time": 0.0, "stdout": _TailBuffer(), "stderr": _TailBuffer()}
+            for name in suite_dirs.values()
+        }
+    
+    def _suite_for(self, nodeid):
+        for part in Path(nodeid.split("::")[0]).parts:
+            if part in self.suite_dirs:
+                return self.suites[self.suite_dirs[part]]
+        return None
+    
+    def pytest_collectreport(self, report):
+        suite = self._suite_for(report.nodeid)
+        if suite is not None and report.failed:
+            suite["failed"] = True
+            suite["stderr"].write(f"{report.nodeid} (collection)\n{report.longreprtext}\n")
+    
+    def pytest_runtest_logreport(self, report):
+        suite = self._suite_for(report.nodeid)
+        if suite is None:
+            return
+        suite["time"] += report.duration
+        if report.when == "call" or not report.passed:
+            suite["stdout"].write(f"{report.nodeid} {report.outcome.upper()}\n")
+        if report.failed:
+            suite["failed"] = True
+            suite["stderr"].write(f"{report.nodeid} ({report.when})\n{report.longreprtext}\n")
+    
+    def record_process(self, proc):
+        """Split the "-rA" summary of a pytest subprocess by suite (durations aren't reported)"""
+        for outcome, nodeid in _SUMMARY_LINE_RE.findall(proc.stdout):
+            suite = self._suite_for(nodeid)
+            if suite is None:
+                continue
+            suite["stdout"].write(f"{nodeid} {outcome}\n")
+            if outcome in ("FAILED", "ERROR"):
+                suite["failed"] = True
+                suite["stderr"].write(f"{nodeid} ({outcome.lower()})\n")
+
+
+class SuiteRun:
+    """Exit code and captured output of one suite run"""
+    
+    def __init__(self, returncode, stdout, stderr):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+def _ensure_agent_importable():
+    """Add the agent directory to sys.path for direct imports of the agent modules"""
+    agent_dir = str(AGENT_DIR)
+    if agent_dir not in sys.path:
+        sys.path.insert(0, agent_dir)
 
 
 class TestRunner:
     """Comprehensive test runner with reporting"""
     
     def __init__(self):
-        self.test_dir = Path(__file__).parent
+        self.test_dir = TESTS_DIR
         self.results = {}
         
     def run_all_tests(self, verbose=True):
-        """Run all test suites and collect results"""
+        """Run all test suites in a single pytest session and collect results"""
         
         print("🧪 MANIM AGENT TEST SUITE")
         print("=" * 50)
         
         test_suites = [
-            ("Unit Tests", "unit/", "🔧"),
-            ("Integration Tests", "integration/", "🔗"),
-            ("Reliability Tests", "reliability/", "🛡️"),
+            ("Unit Tests", "unit", "🔧"),
+            ("Integration Tests", "integration", "🔗"),
+            ("Reliability Tests", "reliability", "🛡️"),
         ]
         
-        total_start_time = time.time()
-        all_passed = True
+        print(f"\n🚀 Running {', '.join(name for name, _, _ in test_suites)}...")
+        print("-" * 30)
+        
+        plugin = _SuiteTimingPlugin({path: name for name, path, _ in test_suites})
+        total_start_time = time.perf_counter()
+        
+        try:
+            code = self._run_session([path for _, path, _ in test_suites], plugin, verbose)
+            crash = None
+        except Exception as e:
+            code, crash = 1, e
+        
+        total_time = time.perf_counter() - total_start_time
+        all_passed = code == 0
         
+        print()
         for suite_name, suite_path, emoji in test_suites:
-            print(f"\n{emoji} Running {suite_name}...")
-            print("-" * 30)
+            suite = plugin.suites[suite_name]
             
-            suite_start_time = time.time()
-            
-            try:
-                result = self._run_test_suite(suite_path, verbose)
-                suite_time = time.time() - suite_start_time
-                
-                self.results[suite_name] = {
-                    "passed": result.returncode == 0,
-                    "time": suite_time,
-                    "output": result.stdout if result.stdout else "",
-                    "errors": result.stderr if result.stderr else ""
-                }
-                
-                if result.returncode == 0:
-                    print(f"✅ {suite_name} passed in {suite_time:.1f}s")
-                else:
-                    print(f"❌ {suite_name} failed in {suite_time:.1f}s")
-                    all_passed = False
-                    if verbose and result.stderr:
-                        print(f"Errors: {result.stderr}")
-                        
-            except Exception as e:
-                print(f"❌ {suite_name} crashed: {e}")
+            if crash is not None:
+                print(f"❌ {emoji} {suite_name} crashed: {crash}")
                 self.results[suite_name] = {
                     "passed": False,
                     "time": 0,
                     "output": "",
-                    "errors": str(e)
+                    "errors": str(crash)
                 }
-                all_passed = False
-        
-        total_time = time.time() - total_start_time
+                continue
+            
+            self.results[suite_name] = {
+                "passed": not suite["failed"],
+                "time": suite["time"],
+                "output": suite["stdout"].getvalue(),
+                "errors": suite["stderr"].getvalue()
+            }
+            
+            if suite["failed"]:
+                print(f"❌ {emoji} {suite_name} failed in {suite['time']:.1f}s")
+                if verbose and self.results[suite_name]["errors"]:
+                    print(f"Errors: {self.results[suite_name]['errors']}")
+            else:
+                print(f"✅ {emoji} {suite_name} passed in {suite['time']:.1f}s")
         
         # Print summary
         print("\n" + "=" * 50)
@@ -91,28 +217,63 @@ class TestRunner:
             print("\n💥 SOME TESTS FAILED!")
             return False
     
-    def _run_test_suite(self, suite_path, verbose=False):
-        """Run a specific test suite"""
+    def _pytest_args(self, suite_paths, verbose=False):
+        """Build pytest arguments for running the given suites in this interpreter"""
         
-        cmd = [
-            sys.executable, "-m", "pytest",
-            str(self.test_dir / suite_path),
+        return [
+            *(str(self.test_dir / suite_path) for suite_path in suite_paths),
             "-v" if verbose else "-q",
             "--tb=short",
-            "--disable-warnings"
+            "-p", "no:cacheprovider",
+            "--disable-warnings",
+            f"--rootdir={AGENT_DIR}"
         ]
+    
+    def _run_session(self, suite_paths, plugin, verbose=False):
+        """Run suites in this interpreter, spreading test files over CPUs when pytest-xdist is installed"""
+        
+        args = self._pytest_args(suite_paths, verbose)
+        if not HAS_XDIST:
+            return pytest.main(args, plugins=[plugin])
         
-        return subprocess.run(
-            cmd,
+        # Tests in one xdist_group share a worker (and its session-scoped
+        # agents). Tests marked serial measure per-process memory/disk, so
+        # they run after the parallel pass without xdist workers, in a fresh
+        # interpreter since pytest.main can't be called twice in one process
+        code = pytest.main([*args, "-n", "auto", "--dist=loadgroup", "-m", "not serial"], plugins=[plugin])
+        serial = subprocess.run(
+            [sys.executable, "-m", "pytest", *args, "-p", "no:xdist", "-m", "serial", "-rA"],
+            cwd=AGENT_DIR,
             capture_output=True,
-            text=True,
-            cwd=self.test_dir.parent
+            text=True
+        )
+        print(serial.stdout, end="")
+        print(serial.stderr, end="", file=sys.stderr)
+        plugin.record_process(serial)
+        serial_code = serial.returncode
+        
+        if code != pytest.ExitCode.OK:
+            return code
+        if serial_code == pytest.ExitCode.NO_TESTS_COLLECTED:
+            return pytest.ExitCode.OK
+        return serial_code
+    
+    def _run_test_suite(self, suite_path, verbose=False):
+        """Run a specific test suite in this interpreter"""
+        
+        reporter = _CaptureReporter()
+        code = self._run_session([suite_path], reporter, verbose)
+        
+        return SuiteRun(
+            returncode=int(code),
+            stdout=reporter.stdout.getvalue(),
+            stderr=reporter.stderr.getvalue()
         )
     
     def run_unit_tests_only(self):
         """Run only unit tests (fastest)"""
         print("🔧 Running Unit Tests Only...")
-        result = self._run_test_suite("tests/unit/", verbose=True)
+        result = self._run_test_suite("unit/", verbose=True)
         return result.returncode == 0
     
     def run_smoke_tests(self):
@@ -120,6 +281,7 @@ class TestRunner:
         print("💨 Running Smoke Tests...")
         
         # Test basic imports
+        _ensure_agent_importable()
         try:
             from manim_agent import create_animation, ManimOutput
             from quality_check_agent import check_animation_quality, QualityReport
@@ -167,8 +329,12 @@ class TestRunner:
             "suites": self.results
         }
         
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        if HAS_ORJSON:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(report, f, indent=2)
         
         print(f"📄 Test report saved to {output_file}")
         return report
@@ -5,12 +5,11 @@ Unit tests for Manim Agent
 import pytest
 import asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
-import tempfile
-import os
 
 from manim_agent import ManimAgentCore, create_animation, ManimOutput
 
 
+@pytest.mark.xdist_group(name="manim_core")
 class TestManimAgentCore:
     """Test the core Manim agent functionality"""
     
@@ -21,27 +20,21 @@ class TestManimAgentCore:
         assert "You are an expert Manim developer" in agent.system_prompt
         assert "VISUAL QUALITY REQUIREMENTS" in agent.system_prompt
     
-    @pytest.mark.asyncio
-    async def test_generate_manim_code_basic(self, mock_anthropic_response):
+    async def test_generate_manim_code_basic(self, mock_anthropic_response, manim_core):
         """Test basic Manim code generation"""
-        agent = ManimAgentCore()
-        
-        with patch.object(agent.client.messages, 'create', new_callable=AsyncMock) as mock_create:
+        with patch.object(manim_core.client.messages, 'create', new_callable=AsyncMock) as mock_create:
             mock_create.return_value = mock_anthropic_response
             
             task_context = {"concept": "sine wave"}
-            code = await agent.generate_manim_code(task_context)
+            code = await manim_core.generate_manim_code(task_context)
             
             assert "class GeneratedScene(Scene)" in code
             assert "def construct(self)" in code
             mock_create.assert_called_once()
     
-    @pytest.mark.asyncio
-    async def test_generate_manim_code_with_context(self, mock_anthropic_response):
+    async def test_generate_manim_code_with_context(self, mock_anthropic_response, manim_core):
         """Test Manim code generation with rich context"""
-        agent = ManimAgentCore()
-        
-        with patch.object(agent.client.messages, 'create', new_callable=AsyncMock) as mock_create:
+        with patch.object(manim_core.client.messages, 'create', new_callable=AsyncMock) as mock_create:
             mock_create.return_value = mock_anthropic_response
             
             task_context = {
@@ -51,7 +44,7 @@ class TestManimAgentCore:
                 "style_direction": {"color_scheme": {"primary": "#3B82F6"}}
             }
             
-            code = await agent.generate_manim_code(task_context)
+            code = await manim_core.generate_manim_code(task_context)
             
             # Verify the prompt includes context
             call_args = mock_create.call_args
@@ -62,49 +55,34 @@ class TestManimAgentCore:
             assert "15.0 seconds" in prompt
             assert "#3B82F6" in prompt
     
-    @pytest.mark.asyncio
-    async def test_render_manim_video_success(self, sample_manim_code, temp_dir):
+    async def test_render_manim_video_success(self, sample_manim_code, manim_core, mock_subprocess_run):
         """Test successful video rendering"""
-        agent = ManimAgentCore()
+        # Mock successful manim command
+        mock_subprocess_run.return_value.returncode = 0
+        mock_subprocess_run.return_value.stderr = ""
         
-        with patch('subprocess.run') as mock_run:
-            # Mock successful manim command
-            mock_run.return_value.returncode = 0
-            mock_run.return_value.stderr = ""
+        with patch('pathlib.Path.mkdir'), \
+             patch('os.path.exists', return_value=True):
             
-            # Create mock output file
-            output_file = os.path.join(temp_dir, "test_output.mp4")
-            with open(output_file, 'w') as f:
-                f.write("mock video content")
+            result = await manim_core.render_manim_video(sample_manim_code, "test_output")
             
-            with patch('pathlib.Path.mkdir'), \
-                 patch('os.path.exists', return_value=True):
-                
-                result = await agent.render_manim_video(sample_manim_code, "test_output")
-                
-                assert result["success"] is True
-                assert "test_output.mp4" in result["video_path"]
-                assert result["duration"] > 0
+            assert result["success"] is True
+            assert "test_output.mp4" in result["video_path"]
+            assert result["duration"] > 0
     
-    @pytest.mark.asyncio  
-    async def test_render_manim_video_failure(self, sample_manim_code):
+    async def test_render_manim_video_failure(self, sample_manim_code, manim_core, mock_subprocess_run):
         """Test video rendering failure"""
-        agent = ManimAgentCore()
+        # Mock failed manim command
+        mock_subprocess_run.return_value.returncode = 1
+        mock_subprocess_run.return_value.stderr = "Manim error: syntax error"
         
-        with patch('subprocess.run') as mock_run:
-            # Mock failed manim command
-            mock_run.return_value.returncode = 1
-            mock_run.return_value.stderr = "Manim error: syntax error"
-            
-            with pytest.raises(RuntimeError) as exc_info:
-                await agent.render_manim_video(sample_manim_code, "test_output")
-            
-            assert "Manim render failed" in str(exc_info.value)
+        with pytest.raises(RuntimeError) as exc_info:
+            await manim_core.render_manim_video(sample_manim_code, "test_output")
+        
+        assert "Manim render failed" in str(exc_info.value)
     
-    def test_extract_visual_elements(self):
+    def test_extract_visual_elements(self, manim_core):
         """Test visual element extraction from Manim code"""
-        agent = ManimAgentCore()
-        
         code = '''
         title = Text("Math Animation")
         axes = Axes()
@@ -112,66 +90,61 @@ class TestManimAgentCore:
         equation = MathTex("y = x^2")
         '''
         
-        elements = agent.extract_visual_elements(code)
+        elements = manim_core.extract_visual_elements(code)
         
         assert "text" in elements
         assert "axes" in elements
         assert "graph" in elements
         assert "equation" in elements
     
-    @pytest.mark.asyncio
-    async def test_process_animation_task_success(self, mock_anthropic_response):
+    async def test_process_animation_task_success(self):
         """Test successful animation task processing"""
-        agent = ManimAgentCore()
+        agent = MagicMock(spec=ManimAgentCore)
+        agent.generate_manim_code.return_value = "mock_code"
+        agent.render_manim_video.return_value = {
+            "success": True,
+            "video_path": "/tmp/test.mp4",
+            "duration": 10.0
+        }
+        agent.extract_visual_elements.return_value = ["title", "graph"]
         
-        with patch.object(agent, 'generate_manim_code', return_value="mock_code") as mock_gen, \
-             patch.object(agent, 'render_manim_video', return_value={
-                 "success": True,
-                 "video_path": "/tmp/test.mp4",
-                 "duration": 10.0
-             }) as mock_render, \
-             patch.object(agent, 'extract_visual_elements', return_value=["title", "graph"]) as mock_extract:
-            
-            task_context = {"concept": "sine wave"}
-            result = await agent.process_animation_task(task_context)
-            
-            assert isinstance(result, ManimOutput)
-            assert result.success is True
-            assert result.video_path == "/tmp/test.mp4"
-            assert result.concept == "sine wave"
-            assert "title" in result.visual_elements
+        task_context = {"concept": "sine wave"}
+        result = await ManimAgentCore.process_animation_task(agent, task_context)
+        
+        assert isinstance(result, ManimOutput)
+        assert result.success is True
+        assert result.video_path == "/tmp/test.mp4"
+        assert result.concept == "sine wave"
+        assert "title" in result.visual_elements
     
-    @pytest.mark.asyncio
     async def test_process_animation_task_with_retry(self, mock_anthropic_response):
         """Test animation task with retry on failure"""
-        agent = ManimAgentCore()
+        agent = MagicMock(spec=ManimAgentCore)
+        # client and system_prompt are set in __init__, so the class spec lacks them
+        agent.client = MagicMock()
+        agent.system_prompt = "system prompt"
+        agent.client.messages.create = AsyncMock(return_value=mock_anthropic_response)
+        agent.generate_manim_code.return_value = "mock_code"
+        agent.extract_visual_elements.return_value = ["title"]
         
-        with patch.object(agent, 'generate_manim_code', return_value="mock_code"), \
-             patch.object(agent.client.messages, 'create', new_callable=AsyncMock) as mock_create:
-            
-            mock_create.return_value = mock_anthropic_response
-            
-            # First render fails, second succeeds
-            render_results = [
-                {"success": False, "error": "Syntax error"},
-                {"success": True, "video_path": "/tmp/test.mp4", "duration": 10.0}
-            ]
-            
-            with patch.object(agent, 'render_manim_video', side_effect=render_results), \
-                 patch.object(agent, 'extract_visual_elements', return_value=["title"]):
-                
-                task_context = {"concept": "test"}
-                result = await agent.process_animation_task(task_context)
-                
-                assert result.success is True
-                # Should have been called twice (retry)
-                assert mock_create.call_count == 2
+        # First render fails, second succeeds
+        agent.render_manim_video.side_effect = [
+            {"success": False, "error": "Syntax error"},
+            {"success": True, "video_path": "/tmp/test.mp4", "duration": 10.0}
+        ]
+        
+        task_context = {"concept": "test"}
+        result = await ManimAgentCore.process_animation_task(agent, task_context)
+        
+        assert result.success is True
+        # Should have been called twice (retry)
+        assert agent.client.messages.create.call_count == 2
 
 
+@pytest.mark.xdist_group(name="create_animation")
 class TestCreateAnimationFunction:
     """Test the standalone create_animation function"""
     
-    @pytest.mark.asyncio
     async def test_create_animation_simple(self):
         """Test simple animation creation"""
         with patch('manim_agent.ManimAgentCore') as mock_agent_class:
@@ -191,7 +164,6 @@ class TestCreateAnimationFunction:
             assert result.concept == "sine wave"
             mock_agent.process_animation_task.assert_called_once()
     
-    @pytest.mark.asyncio
     async def test_create_animation_with_context(self):
         """Test animation creation with full context"""
         with patch('manim_agent.ManimAgentCore') as mock_agent_class:
@@ -220,10 +192,10 @@ class TestCreateAnimationFunction:
             assert call_args["style_direction"]["theme"] == "dark"
 
 
+@pytest.mark.xdist_group(name="manim_core")
 class TestErrorHandling:
     """Test error handling scenarios"""
     
-    @pytest.mark.asyncio
     async def test_api_key_missing(self, monkeypatch):
         """Test behavior when API key is missing"""
         monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
@@ -231,27 +203,23 @@ class TestErrorHandling:
         with pytest.raises((ValueError, Exception)):
             agent = ManimAgentCore()
     
-    @pytest.mark.asyncio
-    async def test_invalid_manim_code(self):
+    async def test_invalid_manim_code(self, manim_core, mock_subprocess_run):
         """Test handling of invalid Manim code"""
-        agent = ManimAgentCore()
-        
         invalid_code = "this is not valid python code !!!"
         
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value.returncode = 1
-            mock_run.return_value.stderr = "SyntaxError: invalid syntax"
-            
-            with pytest.raises(RuntimeError):
-                await agent.render_manim_video(invalid_code, "test")
+        mock_subprocess_run.return_value.returncode = 1
+        mock_subprocess_run.return_value.stderr = "SyntaxError: invalid syntax"
+        
+        with pytest.raises(RuntimeError):
+            await manim_core.render_manim_video(invalid_code, "test")
     
-    @pytest.mark.asyncio
-    async def test_network_timeout(self, mock_anthropic_response):
+    async def test_network_timeout(self, manim_core, monkeypatch):
         """Test handling of network timeouts"""
-        agent = ManimAgentCore()
+        def raise_timeout(*args, **kwargs):
+            # Raises on call, before generate_manim_code gets to await
+            raise asyncio.TimeoutError("Network timeout")
         
-        with patch.object(agent.client.messages, 'create', new_callable=AsyncMock) as mock_create:
-            mock_create.side_effect = asyncio.TimeoutError("Network timeout")
-            
-            with pytest.raises(asyncio.TimeoutError):
-                await agent.generate_manim_code({"concept": "test"})
\ No newline at end of file
+        monkeypatch.setattr(manim_core.client.messages, "create", raise_timeout)
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await manim_core.generate_manim_code({"concept": "test"})
\ No newline at end of file
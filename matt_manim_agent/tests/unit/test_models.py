@@ -0,0 +1,61 @@
+"""
+Unit tests for the Quality Check Agent's Pydantic data models
+"""
+
+import pytest
+
+from quality_check_agent import QualityReport, QualityIssue, AestheticIssue
+
+
+# Other tests build known-good models with model_construct to skip validation;
+# these are the tests that exercise it
+@pytest.mark.xdist_group(name="data_models")
+class TestDataModels:
+    """Test Pydantic data models"""
+    
+    def test_quality_issue_model(self):
+        """Test QualityIssue model validation"""
+        issue = QualityIssue(
+            issue_type="test_issue",
+            severity="high",
+            description="Test description",
+            suggestion="Test suggestion"
+        )
+        
+        assert issue.issue_type == "test_issue"
+        assert issue.severity == "high"
+        assert issue.description == "Test description"
+        assert issue.suggestion == "Test suggestion"
+    
+    def test_aesthetic_issue_model(self):
+        """Test AestheticIssue model validation"""
+        issue = AestheticIssue(
+            frame_number=3,
+            element="title",
+            problem="overlaps with graph",
+            severity="high",
+            suggested_fix="move down 2 units"
+        )
+        
+        assert issue.frame_number == 3
+        assert issue.element == "title"
+        assert issue.problem == "overlaps with graph"
+        assert issue.severity == "high"
+        assert issue.suggested_fix == "move down 2 units"
+    
+    def test_quality_report_model(self):
+        """Test QualityReport model validation"""
+        report = QualityReport(
+            video_path="/tmp/test.mp4",
+            overall_quality="good",
+            technical_metrics={"duration": 10.0},
+            issues=[],
+            recommendations=["Test recommendation"],
+            score=75.0
+        )
+        
+        assert report.video_path == "/tmp/test.mp4"
+        assert report.overall_quality == "good"
+        assert report.score == 75.0
+        assert len(report.recommendations) == 1
+        assert isinstance(report.timestamp, type(report.timestamp))
@@ -5,20 +5,36 @@ Validates that the core two-agent system works end-to-end
 """
 
 import asyncio
+import importlib
 import os
+import tempfile
 import time
-from pathlib import Path
+
+# Agent modules, imported once here and shared by every check
+_MODS = {}
+_IMPORT_ERROR = None
+
+for _name in ("manim_agent", "quality_check_agent"):
+    try:
+        _MODS[_name] = importlib.import_module(_name)
+    except ImportError as e:
+        _IMPORT_ERROR = e
+        break
 
 def test_imports():
     """Test that all core imports work"""
     print("🔧 Testing imports...")
     
     try:
-        from manim_agent import create_animation, ManimOutput, ManimAgentCore
-        from quality_check_agent import check_animation_quality, QualityReport, QualityCheckAgent
+        if _IMPORT_ERROR is not None:
+            raise _IMPORT_ERROR
+        for attr in ("create_animation", "ManimOutput", "ManimAgentCore"):
+            getattr(_MODS["manim_agent"], attr)
+        for attr in ("check_animation_quality", "QualityReport", "QualityCheckAgent"):
+            getattr(_MODS["quality_check_agent"], attr)
         print("  ✅ All imports successful")
         return True
-    except ImportError as e:
+    except (ImportError, AttributeError) as e:
         print(f"  ❌ Import failed: {e}")
         return False
 
@@ -27,12 +43,9 @@ def test_agent_initialization():
     print("🤖 Testing agent initialization...")
     
     try:
-        from manim_agent import ManimAgentCore
-        from quality_check_agent import QualityCheckAgent
-        
         # Test core agents
-        manim_agent = ManimAgentCore()
-        quality_agent = QualityCheckAgent()
+        manim_agent = _MODS["manim_agent"].ManimAgentCore()
+        quality_agent = _MODS["quality_check_agent"].QualityCheckAgent()
         
         print("  ✅ Both agents initialized successfully")
         return True
@@ -45,11 +58,9 @@ async def test_generation_functionality():
     print("🎬 Testing generation functionality...")
     
     try:
-        from manim_agent import create_animation
-        
         # This would make a real API call, so we'll just test the function exists
         # and can be called (it will fail due to API constraints in testing)
-        assert callable(create_animation)
+        assert callable(_MODS["manim_agent"].create_animation)
         print("  ✅ Generation function is callable")
         return True
     except Exception as e:
@@ -61,19 +72,17 @@ async def test_quality_functionality():
     print("🔍 Testing quality check functionality...")
     
     try:
-        # Create a dummy video file for testing
-        test_video = Path("test_dummy.mp4")
-        test_video.write_bytes(b"dummy video content")
-        
-        # This will fail because it's not a real video, but we can test error handling
-        try:
-            await check_animation_quality(str(test_video))
-        except Exception:
-            # Expected to fail with dummy video
-            pass
-        
-        # Clean up
-        test_video.unlink()
+        # Dummy video in the temp dir, removed when the block exits
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=True) as test_video:
+            test_video.write(b"dummy video content")
+            test_video.flush()
+            
+            # This will fail because it's not a real video, but we can test error handling
+            try:
+                await _MODS["quality_check_agent"].check_animation_quality(test_video.name)
+            except Exception:
+                # Expected to fail with dummy video
+                pass
         
         print("  ✅ Quality check function is callable")
         return True
@@ -86,11 +95,10 @@ def test_data_models():
     print("📊 Testing data models...")
     
     try:
-        from quality_check_agent import QualityIssue, AestheticIssue, QualityReport
-        from manim_agent import ManimOutput
+        quality_check_agent = _MODS["quality_check_agent"]
         
         # Test ManimOutput
-        output = ManimOutput(
+        output = _MODS["manim_agent"].ManimOutput(
             success=True,
             concept="test",
             video_path="/tmp/test.mp4"
@@ -99,7 +107,7 @@ def test_data_models():
         assert output.concept == "test"
         
         # Test QualityIssue
-        issue = QualityIssue(
+        issue = quality_check_agent.QualityIssue(
             issue_type="test_issue",
             severity="medium",
             description="Test description",
@@ -108,7 +116,7 @@ def test_data_models():
         assert issue.severity == "medium"
         
         # Test AestheticIssue
-        aesthetic = AestheticIssue(
+        aesthetic = quality_check_agent.AestheticIssue(
             frame_number=1,
             element="title",
             problem="test problem",
@@ -127,12 +135,8 @@ def test_environment():
     """Test environment configuration"""
     print("🌍 Testing environment...")
     
-    api_keys = {
-        "ANTHROPIC_API_KEY": os.getenv("ANTHROPIC_API_KEY"),
-        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY")
-    }
-    
-    missing_keys = [key for key, value in api_keys.items() if not value]
+    required_keys = ("ANTHROPIC_API_KEY", "OPENAI_API_KEY")
+    missing_keys = [key for key in required_keys if not os.environ.get(key)]
     
     if not missing_keys:
         print("  ✅ All API keys are configured")
@@ -148,24 +152,24 @@ async def main():
     print("🧪 SYSTEM VALIDATION")
     print("=" * 40)
     
+    # (name, check, is_async)
     tests = [
-        ("Import Test", test_imports),
-        ("Agent Initialization", test_agent_initialization), 
-        ("Environment Check", test_environment),
-        ("Data Models", test_data_models),
-        ("Generation Function", test_generation_functionality),
-        ("Quality Function", test_quality_functionality),
+        ("Import Test", test_imports, False),
+        ("Agent Initialization", test_agent_initialization, False),
+        ("Environment Check", test_environment, False),
+        ("Data Models", test_data_models, False),
+        ("Generation Function", test_generation_functionality, True),
+        ("Quality Function", test_quality_functionality, True),
     ]
     
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
+    # Checks print as they go, so they run one at a time to keep each
+    # check's output under its own header
+    for test_name, test_func, is_async in tests:
         try:
-            if asyncio.iscoroutinefunction(test_func):
-                result = await test_func()
-            else:
-                result = test_func()
+            result = await test_func() if is_async else test_func()
             
             if result:
                 passed += 1
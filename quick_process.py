@@ -7,7 +7,6 @@ Use this when the web interface hangs on "Processing uploaded content..."
 import asyncio
 import sys
 from pathlib import Path
-from simple_document_processor import SimpleDocumentProcessor
 
 async def main():
     if len(sys.argv) < 2:
@@ -35,6 +34,8 @@ async def main():
     print(f"⏱️ Target duration: {duration} minutes")
     print()
     
+    # Deferred so the usage/error paths above don't import the anthropic SDK
+    from simple_document_processor import SimpleDocumentProcessor
     processor = SimpleDocumentProcessor()
     
     print("🔍 Extracting content...")
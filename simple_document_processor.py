@@ -6,26 +6,256 @@ Direct inference without complex pipeline
 
 import os
 import asyncio
+import hashlib
+import multiprocessing
+import threading
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import tempfile
-import base64
-from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
-from dotenv import load_dotenv
-from anthropic import AsyncAnthropic
+# PDF text extractor, resolved on first use by _get_pdf_backend()
+_PDF_BACKEND = None
+
+# Anthropic client of the process_document call in progress. httpx connections
+# belong to the loop that opened them and web_interface runs a loop per
+# request, so each call opens its own client and closes it before returning
+_ANTHROPIC_CLIENT: ContextVar[Any] = ContextVar("anthropic_client", default=None)
+
+# PDFs with fewer pages than this are extracted in-process
+_PARALLEL_PDF_MIN_PAGES = 64
+
+# Worker processes for large PDFs, created by _get_pdf_pool()
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+# Extracted text shorter than this isn't sent to Claude for a summary
+_MIN_SUMMARY_CHARS = 100
+
+# Start of the messages returned in place of text when extraction fails
+_PLACEHOLDER_PREFIXES = ("Content extracted from", "Image content from")
+
+# Seconds to spend opening the API connection ahead of the summary request
+_WARM_UP_TIMEOUT = 2.0
+
+# Extracted text keyed by a hash of the source file's contents; next to this
+# module unless EDUAGENT_CACHE_DIR is set, so it doesn't depend on the cwd
+_EXTRACT_CACHE_DIR = Path(os.getenv("EDUAGENT_CACHE_DIR", Path(__file__).resolve().parent / ".cache")) / "extract"
+
+# Least recently written extractions beyond this many are pruned
+_EXTRACT_CACHE_MAX_FILES = 256
+
+# Claude Vision request used by _extract_from_image
+_VISION_MODEL = "claude-3-5-sonnet-20241022"
+_VISION_PROMPT = "Extract all text content from this image. Include any mathematical formulas, diagrams descriptions, and educational content. Format it clearly."
+
+# Instructions for _generate_educational_summary; identical on every request
+_SUMMARY_PROMPT_HEAD = """Create an educational summary for a video of the target length given below, based on the content that follows.
+
+Format your response as:
+
+# Main Topic
+[Clear topic title]
+
+## Key Learning Objectives
+- [3-4 main learning goals]
+
+## Content Breakdown
+[Structured explanation suitable for the target length]
+
+## Visual Elements Needed
+- [Suggestions for animations/graphics]
+
+## Key Takeaways
+- [Main points students should remember]
+
+Keep it concise but comprehensive for the time limit."""
+
+
+def _extract_fitz_page_range(pdf_path: str, start: int, stop: int) -> str:
+    """Extract text from pages [start, stop) with a process-local PyMuPDF document"""
+    import fitz
+    doc = fitz.open(pdf_path)
+    try:
+        return "".join(doc[i].get_text() for i in range(start, stop))
+    finally:
+        doc.close()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all large PDF extractions, created on first use"""
+    global _PDF_POOL
+    
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            # Callers run in asyncio.to_thread workers, and forking a
+            # multi-threaded process can deadlock the child, so spawn instead
+            _PDF_POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _PDF_POOL
+
+
+def _extract_pdf_fitz(fitz, pdf_path: str) -> str:
+    """Extract PDF text with PyMuPDF"""
+    doc = fitz.open(pdf_path)
+    try:
+        page_count = doc.page_count
+        if page_count < _PARALLEL_PDF_MIN_PAGES:
+            return "".join(page.get_text() for page in doc).strip()
+    finally:
+        doc.close()
+    
+    # PyMuPDF is not thread-safe, so large documents are split into page
+    # ranges extracted in separate processes and joined in page order
+    workers = min(os.cpu_count() or 1, page_count // (_PARALLEL_PDF_MIN_PAGES // 2))
+    step = -(-page_count // workers)
+    starts = range(0, page_count, step)
+    stops = [min(start + step, page_count) for start in starts]
+    
+    parts = _get_pdf_pool().map(_extract_fitz_page_range, [pdf_path] * len(starts), starts, stops)
+    return "".join(parts).strip()
+
+
+def _extract_pdf_pypdf2(PyPDF2, pdf_path: str) -> str:
+    """Extract PDF text with PyPDF2"""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        text = "".join(page.extract_text() for page in reader.pages)
+    return text.strip()
+
+
+def _extract_pdf_unavailable(pdf_path: str) -> str:
+    """Placeholder when no PDF library is installed"""
+    return f"Content extracted from {Path(pdf_path).name} (text extraction not available)"
+
+
+def _get_pdf_backend():
+    """Pick the PDF extractor once: PyMuPDF, then PyPDF2, then a placeholder"""
+    global _PDF_BACKEND
+    
+    if _PDF_BACKEND is None:
+        try:
+            import fitz
+            _PDF_BACKEND = partial(_extract_pdf_fitz, fitz)
+        except ImportError:
+            try:
+                import PyPDF2
+                _PDF_BACKEND = partial(_extract_pdf_pypdf2, PyPDF2)
+            except ImportError:
+                _PDF_BACKEND = _extract_pdf_unavailable
+    
+    return _PDF_BACKEND
+
+
+def _read_base64(path: str) -> str:
+    """Read a file and return its contents base64-encoded as ASCII text"""
+    import base64
+    return base64.b64encode(Path(path).read_bytes()).decode('ascii')
+
+
+def _file_digest(path: str) -> str:
+    """BLAKE2b digest of a file's contents, read in 1 MiB chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(partial(file.read, 1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _needs_summary(content: str) -> bool:
+    """Whether extracted content is worth a summary request"""
+    return len(content.strip()) >= _MIN_SUMMARY_CHARS and not content.startswith(_PLACEHOLDER_PREFIXES)
+
+
+def _extractor_tag(file_ext: str) -> str:
+    """Names the extractor behind a cache entry, so a new backend or prompt misses the cache"""
+    if file_ext == '.pdf':
+        backend = _get_pdf_backend()
+        return getattr(backend, "func", backend).__name__.replace("_extract_pdf_", "pdf-")
+    
+    vision = hashlib.blake2b(f"{_VISION_MODEL}\n{_VISION_PROMPT}".encode(), digest_size=4)
+    return f"vision-{vision.hexdigest()}"
+
+
+def _read_cached_text(path: Path) -> Optional[str]:
+    """Cached extraction at path, or None when there isn't one"""
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached_text(path: Path, text: str) -> None:
+    """Store an extraction, then prune the cache down to its size limit"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    
+    try:
+        entries = sorted(path.parent.glob("*.txt"), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:-_EXTRACT_CACHE_MAX_FILES]:
+            entry.unlink(missing_ok=True)
+    except OSError:
+        # Another process pruned concurrently; the next write tries again
+        pass
+
+
+def _new_anthropic_client():
+    """AsyncAnthropic client whose requests within one document share a connection pool"""
+    import httpx
+    from anthropic import AsyncAnthropic
+    
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    
+    return AsyncAnthropic(
+        api_key=os.getenv("ANTHROPIC_API_KEY"),
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            http2=http2
+        )
+    )
 
-load_dotenv()
 
 class SimpleDocumentProcessor:
     """Simple document processor using direct API calls"""
     
     def __init__(self):
-        self.anthropic = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        # Imported here so importing this module (e.g. for CLI usage text)
+        # doesn't pay for the dotenv/anthropic imports
+        from dotenv import load_dotenv
+        
+        load_dotenv()
+    
+    @property
+    def anthropic(self):
+        """Anthropic client of the process_document call this runs in"""
+        client = _ANTHROPIC_CLIENT.get()
+        if client is None:
+            raise RuntimeError("The Anthropic client is only available inside process_document")
+        return client
     
     async def process_document(self, file_path: str, duration_minutes: float = 1.0, progress_callback=None) -> Dict[str, Any]:
         """Process a document and create educational content"""
         
+        # Closed on the way out so no keep-alive sockets outlive the caller's loop
+        async with _new_anthropic_client() as client:
+            token = _ANTHROPIC_CLIENT.set(client)
+            try:
+                return await self._process_document(file_path, duration_minutes, progress_callback)
+            finally:
+                _ANTHROPIC_CLIENT.reset(token)
+    
+    async def _process_document(self, file_path: str, duration_minutes: float, progress_callback=None) -> Dict[str, Any]:
+        """Extract, summarize and write the report for one document"""
+        from datetime import datetime
+        
         try:
             # Step 1: Extract content from document
             if progress_callback:
@@ -43,18 +273,23 @@ class SimpleDocumentProcessor:
             output_dir = Path("output_videos")
             output_dir.mkdir(exist_ok=True)
             
-            output_file = output_dir / f"edu_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            # One clock read so the filename and header agree
+            now = datetime.now()
+            output_file = output_dir / f"edu_content_{now.strftime('%Y%m%d_%H%M%S')}.txt"
             
-            with open(output_file, 'w') as f:
-                f.write(f"🎓 Educational Content Summary\n")
-                f.write(f"=" * 50 + "\n\n")
-                f.write(f"📄 Source: {Path(file_path).name}\n")
-                f.write(f"⏱️ Target Duration: {duration_minutes} minutes\n")
-                f.write(f"📅 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"📝 Content:\n")
-                f.write(f"-" * 20 + "\n")
-                f.write(summary)
-                f.write(f"\n\n💡 This content is ready for video creation!")
+            report = "".join([
+                f"🎓 Educational Content Summary\n",
+                f"=" * 50 + "\n\n",
+                f"📄 Source: {Path(file_path).name}\n",
+                f"⏱️ Target Duration: {duration_minutes} minutes\n",
+                f"📅 Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+                f"📝 Content:\n",
+                f"-" * 20 + "\n",
+                summary,
+                f"\n\n💡 This content is ready for video creation!",
+            ])
+            # Write off the event loop so concurrent requests aren't blocked
+            await asyncio.to_thread(output_file.write_text, report)
             
             return {
                 "success": True,
@@ -72,76 +307,98 @@ class SimpleDocumentProcessor:
             }
     
     async def _extract_content(self, file_path: str, progress_callback=None) -> str:
-        """Extract content from PDF or image"""
+        """Extract content from PDF or image, reusing the cached text for unchanged files"""
         
-        file_ext = Path(file_path).suffix.lower()
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext not in ['.pdf', '.png', '.jpg', '.jpeg']:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+        
+        try:
+            digest = await asyncio.to_thread(_file_digest, file_path)
+        except OSError:
+            # Unreadable file: the extractors report it in their own placeholder text
+            return await self._extract_uncached(file_path, file_ext, progress_callback)
+        
+        cache_file = _EXTRACT_CACHE_DIR / f"{_extractor_tag(file_ext)}-{digest}.txt"
+        cached = await asyncio.to_thread(_read_cached_text, cache_file)
+        if cached is not None:
+            return cached
+        
+        content = await self._extract_uncached(file_path, file_ext, progress_callback)
+        
+        # Placeholders and error messages are retried next time rather than cached
+        if not content.startswith(_PLACEHOLDER_PREFIXES):
+            await asyncio.to_thread(_write_cached_text, cache_file, content)
+        
+        return content
+    
+    async def _extract_uncached(self, file_path: str, file_ext: str, progress_callback=None) -> str:
+        """Extract content from PDF or image"""
         
         if file_ext == '.pdf':
             if progress_callback:
                 await progress_callback("📄 Processing PDF document...")
-            return await self._extract_from_pdf(file_path)
+            
+            # Open the API connection while pages are parsed
+            warm_up = asyncio.create_task(self._warm_up_connection())
+            try:
+                content = await self._extract_from_pdf(file_path)
+            except BaseException:
+                warm_up.cancel()
+                raise
+            
+            if _needs_summary(content):
+                await warm_up
+            else:
+                # No request follows
+                warm_up.cancel()
+            return content
         elif file_ext in ['.png', '.jpg', '.jpeg']:
             if progress_callback:
                 await progress_callback("🖼️ Processing image with AI Vision...")
-            return await self._extract_from_image(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_ext}")
+            return await self._extract_from_image(file_path, file_ext)
     
-    async def _extract_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF using simple method"""
+    async def _warm_up_connection(self) -> None:
+        """Establish the HTTPS connection to the API before the first real request"""
         
-        try:
-            # Try PyMuPDF first
-            import fitz
-            doc = fitz.open(pdf_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text.strip()
-        except ImportError:
-            pass
+        if not os.getenv("ANTHROPIC_API_KEY"):
+            return
         
         try:
-            # Fallback to PyPDF2
-            import PyPDF2
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-            return text.strip()
-        except ImportError:
+            # Only saves a handshake, so it never holds up the document for long
+            await self.anthropic.with_options(timeout=_WARM_UP_TIMEOUT, max_retries=0).models.list(limit=1)
+        except Exception:
+            # Best effort; the summary request reports any real failure
             pass
-        
-        # Ultimate fallback
-        return f"Content extracted from {Path(pdf_path).name} (text extraction not available)"
     
-    async def _extract_from_image(self, image_path: str) -> str:
+    async def _extract_from_pdf(self, pdf_path: str) -> str:
+        """Extract text from PDF using simple method"""
+        # In a thread so the event loop stays free while pages are parsed
+        return await asyncio.to_thread(_get_pdf_backend(), pdf_path)
+    
+    async def _extract_from_image(self, image_path: str, file_ext: str) -> str:
         """Extract text from image using Claude Vision"""
         
         if not os.getenv("ANTHROPIC_API_KEY"):
             return f"Image content from {Path(image_path).name} (Vision API not available)"
         
         try:
-            # Read and encode image
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-            
             # Get file type
-            file_ext = Path(image_path).suffix.lower()
             media_type = f"image/{'jpeg' if file_ext in ['.jpg', '.jpeg'] else 'png'}"
             
+            # Read and encode together in a thread; encoding a large image is CPU-bound
+            image_data = await asyncio.to_thread(_read_base64, image_path)
+            
             # Use Claude Vision to extract text
             response = await self.anthropic.messages.create(
-                model="claude-3-5-sonnet-20241022",
+                model=_VISION_MODEL,
                 max_tokens=2000,
                 messages=[{
                     "role": "user",
                     "content": [
                         {
                             "type": "text",
-                            "text": "Extract all text content from this image. Include any mathematical formulas, diagrams descriptions, and educational content. Format it clearly."
+                            "text": _VISION_PROMPT
                         },
                         {
                             "type": "image",
@@ -163,6 +420,10 @@ class SimpleDocumentProcessor:
     async def _generate_educational_summary(self, content: str, duration_minutes: float) -> str:
         """Generate educational summary using Claude"""
         
+        # Nothing worth a round trip: too short, or an extraction placeholder
+        if not _needs_summary(content):
+            return f"Insufficient content extracted from source.\n\n{content}"
+        
         if not os.getenv("ANTHROPIC_API_KEY"):
             return f"Educational content based on extracted text:\n\n{content[:500]}..."
         
@@ -171,29 +432,19 @@ class SimpleDocumentProcessor:
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=1500,
                 messages=[{
-                    "role": "user", 
-                    "content": f"""Create an educational summary for a {duration_minutes}-minute video based on this content:
-
-{content}
-
-Format your response as:
-
-# Main Topic
-[Clear topic title]
-
-## Key Learning Objectives
-- [3-4 main learning goals]
-
-## Content Breakdown
-[Structured explanation suitable for {duration_minutes} minutes]
-
-## Visual Elements Needed
-- [Suggestions for animations/graphics]
-
-## Key Takeaways
-- [Main points students should remember]
-
-Keep it concise but comprehensive for the time limit."""
+                    "role": "user",
+                    "content": [
+                        # Static instructions first. At ~130 tokens they are below the
+                        # 1024-token minimum for prompt caching, so no cache_control
+                        {
+                            "type": "text",
+                            "text": _SUMMARY_PROMPT_HEAD
+                        },
+                        {
+                            "type": "text",
+                            "text": f"Target video length: {duration_minutes} minutes\n\nContent:\n\n{content}"
+                        }
+                    ]
                 }]
             )
             
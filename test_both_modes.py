@@ -160,7 +160,8 @@ def main():
     print("🧪 EduAgent AI - Web Interface Mode Testing")
     print("=" * 50)
     
-    # Test demo mode
+    # Test demo mode; it strips the API keys from os.environ while it runs,
+    # so real mode only starts once they are restored
     test_demo_mode()
     
     # Test real mode
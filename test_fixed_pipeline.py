@@ -4,14 +4,17 @@ Test the fixed full pipeline
 """
 
 import asyncio
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger("eduagent.tests")
+
 async def test_fixed_pipeline():
     """Test the complete fixed pipeline"""
     
-    print("🎬 Testing Fixed Full Pipeline")
-    print("=" * 50)
+    logger.info("🎬 Testing Fixed Full Pipeline")
+    logger.info("=" * 50)
     
     # Use the web interface method which should work
     from web_interface import EduAgentInterface
@@ -25,9 +28,8 @@ async def test_fixed_pipeline():
     
     test_file = MockFile("lesson_pdfs/sample_calculus.pdf")
     
-    print(f"📁 Processing: {test_file.name}")
-    print("⏱️  This should take 30-90 seconds...")
-    print()
+    logger.info("📁 Processing: %s", test_file.name)
+    logger.info("⏱️  This should take 30-90 seconds...")
     
     try:
         # Use the web interface's async method
@@ -42,29 +44,27 @@ async def test_fixed_pipeline():
             False               # normal speed
         )
         
-        print("🎯 Final Results:")
-        print("-" * 30)
-        print(f"✅ Success: {result['success']}")
+        logger.info("🎯 Final Results:")
+        logger.info("-" * 30)
+        logger.info("✅ Success: %s", result['success'])
         
         if result['success']:
             video_path = result.get('video_path')
-            print(f"🎬 Video: {video_path}")
+            logger.info("🎬 Video: %s", video_path)
             
             if video_path and Path(video_path).exists():
                 file_size = Path(video_path).stat().st_size / (1024*1024)  # MB
-                print(f"📊 Size: {file_size:.1f} MB")
-                print(f"⏱️  Duration: {result.get('duration', 0):.1f} seconds")
-                print()
-                print("🎉 SUCCESS! Real video file created!")
+                logger.info("📊 Size: %.1f MB", file_size)
+                logger.info("⏱️  Duration: %.1f seconds", result.get('duration', 0))
+                logger.info("🎉 SUCCESS! Real video file created!")
             else:
-                print("📝 Demo mode - no actual video file")
+                logger.info("📝 Demo mode - no actual video file")
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            logger.warning("❌ Error: %s", result.get('error', 'Unknown error'))
             
     except Exception as e:
-        print(f"❌ Pipeline failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Pipeline failed: %s", e)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(message)s")
     asyncio.run(test_fixed_pipeline())
\ No newline at end of file
@@ -4,14 +4,18 @@ Test script for the full video generation pipeline
 """
 
 import asyncio
+import logging
+import os
 from web_interface import EduAgentInterface
 from pathlib import Path
 
+logger = logging.getLogger("eduagent.tests")
+
 async def test_full_pipeline():
     """Test the complete video generation pipeline"""
     
-    print("🎬 Testing Full Video Generation Pipeline")
-    print("=" * 60)
+    logger.info("🎬 Testing Full Video Generation Pipeline")
+    logger.info("=" * 60)
     
     # Create interface
     interface = EduAgentInterface()
@@ -26,15 +30,14 @@ async def test_full_pipeline():
     
     test_file = MockFile(test_file_path)
     
-    print(f"📁 Testing with file: {test_file.name}")
-    print(f"🎯 Target: High School Mathematics, 1 minute duration")
-    print()
+    logger.info("📁 Testing with file: %s", test_file.name)
+    logger.info("🎯 Target: High School Mathematics, 1 minute duration")
     
     # Test the async video generation directly
-    print("🔄 Starting full pipeline test...")
+    logger.info("🔄 Starting full pipeline test...")
     
     try:
-        print("⏱️  This may take 30-120 seconds for full video generation...")
+        logger.info("⏱️  This may take 30-120 seconds for full video generation...")
         
         result = await interface._async_generate_video(
             test_file, 
@@ -47,31 +50,30 @@ async def test_full_pipeline():
             False               # normal speed
         )
         
-        print("\n📊 Pipeline Test Results:")
-        print("-" * 30)
-        print(f"✅ Success: {result['success']}")
+        logger.info("📊 Pipeline Test Results:")
+        logger.info("-" * 30)
+        logger.info("✅ Success: %s", result['success'])
         
         if result["success"]:
-            print(f"🎬 Video path: {result.get('video_path', 'Not generated')}")
-            print(f"⏱️  Duration: {result.get('duration', 0):.1f} seconds")
-            print(f"📦 File size: {result.get('size_mb', 0):.1f} MB")
-            print(f"♿ Features: {result.get('accessibility_features', [])}")
+            logger.info("🎬 Video path: %s", result.get('video_path', 'Not generated'))
+            logger.info("⏱️  Duration: %.1f seconds", result.get('duration', 0))
+            logger.info("📦 File size: %.1f MB", result.get('size_mb', 0))
+            logger.info("♿ Features: %s", result.get('accessibility_features', []))
             
             # Check if actual video was created
             video_path = result.get('video_path')
             if video_path and Path(video_path).exists():
-                print(f"🎉 Real MP4 video created at: {video_path}")
+                logger.info("🎉 Real MP4 video created at: %s", video_path)
             else:
-                print("📝 Demo/simulation mode - no actual video file")
+                logger.info("📝 Demo/simulation mode - no actual video file")
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            logger.warning("❌ Error: %s", result.get('error', 'Unknown error'))
         
-        print("\n✅ Full pipeline test completed!")
+        logger.info("✅ Full pipeline test completed!")
         
     except Exception as e:
-        print(f"❌ Pipeline test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Pipeline test failed: %s", e)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(message)s")
     asyncio.run(test_full_pipeline())
\ No newline at end of file
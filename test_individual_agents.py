@@ -4,55 +4,23 @@ Test individual agents to see which one is causing issues
 """
 
 import asyncio
+import logging
 import os
 from pathlib import Path
 from unified_edu_agent import UnifiedEducationalVideoGenerator
 
-async def test_individual_agents():
-    """Test each agent individually"""
-    
-    print("🧪 Testing Individual Agents")
-    print("=" * 50)
-    
-    generator = UnifiedEducationalVideoGenerator()
-    
-    # Test content
-    test_content = """
-    Introduction to Derivatives
-    A derivative represents the instantaneous rate of change of a function.
-    For f(x) = x², the derivative is f'(x) = 2x.
-    """
-    
-    # 1. Test Content Extractor
-    print("🔍 Testing Content Extractor...")
+logger = logging.getLogger("eduagent.tests")
+
+async def probe_content_extractor(generator, test_content):
+    """Run the content extractor; returns (name, ok, detail)"""
     try:
         content = await generator.content_extractor.analyze_content(test_content)
-        print(f"✅ Content analysis successful: {content.subject_area}")
+        return "🔍 Content Extractor", True, f"Content analysis successful: {content.subject_area}"
     except Exception as e:
-        print(f"❌ Content extractor failed: {e}")
-    print()
-    
-    # 2. Test Lesson Planner (this might be the issue)
-    print("📚 Testing Lesson Planner...")
-    try:
-        from crewai import Task
-        lesson_task = Task(
-            description=f"Create a lesson plan for: {test_content}",
-            expected_output="A structured lesson plan with sections and visualization concepts",
-            agent=generator.lesson_planner
-        )
-        
-        print("⚠️  Trying to execute lesson planning task...")
-        # This is where it might be failing
-        lesson_plan = await generator.lesson_planner.execute(lesson_task)
-        print(f"✅ Lesson plan created: {lesson_plan.title if hasattr(lesson_plan, 'title') else 'Success'}")
-    except Exception as e:
-        print(f"❌ Lesson planner failed: {e}")
-        print("   This is likely where the pipeline is breaking!")
-    print()
-    
-    # 3. Test Manim Agent directly  
-    print("🎨 Testing Manim Agent...")
+        return "🔍 Content Extractor", False, f"Content extractor failed: {e}"
+
+async def probe_manim_agent(generator):
+    """Run the Manim agent directly; returns (name, ok, detail)"""
     try:
         from crewai import Task
         anim_task = Task(
@@ -61,15 +29,13 @@ async def test_individual_agents():
             agent=generator.manim_agent
         )
         
-        print("⚠️  Trying to execute Manim task...")
         anim = await generator.manim_agent.execute(anim_task)
-        print(f"✅ Animation created: {anim}")
+        return "🎨 Manim Agent", True, f"Animation created: {anim}"
     except Exception as e:
-        print(f"❌ Manim agent failed: {e}")
-    print()
-    
-    # 4. Test LMNT Audio
-    print("🎙️ Testing LMNT Audio...")
+        return "🎨 Manim Agent", False, f"Manim agent failed: {e}"
+
+async def probe_lmnt_audio(generator):
+    """Generate a narration for a mock lesson; returns (name, ok, detail)"""
     try:
         # Create a mock lesson plan
         class MockLessonPlan:
@@ -91,13 +57,67 @@ async def test_individual_agents():
             [],  # no animations yet
             voice_preset="math_teacher"
         )
-        print(f"✅ Audio narration created: {narration.audio_path if hasattr(narration, 'audio_path') else 'Success'}")
+        return "🎙️ LMNT Audio", True, f"Audio narration created: {narration.audio_path if hasattr(narration, 'audio_path') else 'Success'}"
+    except Exception as e:
+        return "🎙️ LMNT Audio", False, f"LMNT audio failed: {e}"
+
+def log_probe_result(result):
+    """Log one (name, ok, detail) probe result"""
+    name, ok, detail = result
+    if ok:
+        logger.info("%s: ✅ %s", name, detail)
+    else:
+        logger.warning("%s: ❌ %s", name, detail)
+
+async def test_individual_agents():
+    """Test each agent individually"""
+    
+    logger.info("🧪 Testing Individual Agents")
+    logger.info("=" * 50)
+    
+    generator = UnifiedEducationalVideoGenerator()
+    
+    # Test content
+    test_content = """
+    Introduction to Derivatives
+    A derivative represents the instantaneous rate of change of a function.
+    For f(x) = x², the derivative is f'(x) = 2x.
+    """
+    
+    # 1-3. Content extractor, Manim and LMNT don't depend on each other, so run them together
+    logger.info("🔍🎨🎙️ Testing Content Extractor, Manim Agent and LMNT Audio concurrently...")
+    results = await asyncio.gather(
+        probe_content_extractor(generator, test_content),
+        probe_manim_agent(generator),
+        probe_lmnt_audio(generator),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            # Probes catch their own errors; this is a crash in the probe itself
+            result = ("⚠️ Probe", False, f"Probe crashed: {result}")
+        log_probe_result(result)
+    
+    # 4. Test Lesson Planner (this might be the issue)
+    logger.info("📚 Testing Lesson Planner...")
+    try:
+        from crewai import Task
+        lesson_task = Task(
+            description=f"Create a lesson plan for: {test_content}",
+            expected_output="A structured lesson plan with sections and visualization concepts",
+            agent=generator.lesson_planner
+        )
+        
+        logger.debug("⚠️  Trying to execute lesson planning task...")
+        # This is where it might be failing
+        lesson_plan = await generator.lesson_planner.execute(lesson_task)
+        logger.info("✅ Lesson plan created: %s", getattr(lesson_plan, 'title', 'Success'))
     except Exception as e:
-        print(f"❌ LMNT audio failed: {e}")
-    print()
+        logger.warning("❌ Lesson planner failed: %s", e)
+        logger.warning("   This is likely where the pipeline is breaking!")
     
     # 5. Test Video Composer
-    print("🎬 Testing Video Composer...")
+    logger.info("🎬 Testing Video Composer...")
     try:
         # Use mock objects
         class MockLessonPlan:
@@ -122,14 +142,14 @@ async def test_individual_agents():
             mock_animations, 
             mock_narration
         )
-        print(f"✅ Video composition: {video_result.get('success', False)}")
+        logger.info("✅ Video composition: %s", video_result.get('success', False))
         if video_result.get('video_path'):
-            print(f"   Video saved to: {video_result['video_path']}")
+            logger.info("   Video saved to: %s", video_result['video_path'])
     except Exception as e:
-        print(f"❌ Video composer failed: {e}")
-    print()
+        logger.warning("❌ Video composer failed: %s", e)
     
-    print("🎯 Summary: Check which agent is failing and fix that specific component")
+    logger.info("🎯 Summary: Check which agent is failing and fix that specific component")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(message)s")
     asyncio.run(test_individual_agents())
\ No newline at end of file
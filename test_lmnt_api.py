@@ -5,11 +5,41 @@ Test LMNT API directly to diagnose issues
 
 import os
 import asyncio
+import shutil
 import aiohttp
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Session shared by the probes, created by _session()
+_SESSION = None
+
+async def _session() -> aiohttp.ClientSession:
+    """One keep-alive session reused by every probe in this run"""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+        )
+    return _SESSION
+
+async def _mp3_to_wav(mp3_path: str, wav_path: str) -> bool:
+    """Decode the downloaded MP3 to 24 kHz WAV with ffmpeg, if it's installed"""
+    if shutil.which("ffmpeg") is None:
+        print(f"⚠️ ffmpeg not found, skipping WAV conversion")
+        return False
+    
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-y", "-loglevel", "error", "-i", mp3_path, "-ar", "24000", wav_path,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        print(f"❌ ffmpeg conversion failed: {stderr.decode(errors='replace').strip()}")
+        return False
+    return True
+
 async def test_lmnt_api():
     """Test the LMNT API with a simple request"""
     
@@ -30,7 +60,7 @@ async def test_lmnt_api():
         "text": "Hello, this is a test of the LMNT text to speech API.",
         "voice": "lily",
         "speed": 1.0,
-        "format": "wav",
+        "format": "mp3",  # compressed on the wire, decoded locally
         "sample_rate": 24000
     }
     
@@ -39,39 +69,50 @@ async def test_lmnt_api():
     print(f"Voice: lily")
     print(f"Text: {payload['text']}")
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                "https://api.lmnt.com/v1/ai/speech",
-                headers=headers,
-                json=payload
-            ) as response:
-                print(f"\n📡 Response Status: {response.status}")
-                print(f"Headers: {dict(response.headers)}")
+    session = await _session()
+    try:
+        async with session.post(
+            "https://api.lmnt.com/v1/ai/speech",
+            headers=headers,
+            json=payload
+        ) as response:
+            print(f"\n📡 Response Status: {response.status}")
+            print(f"Headers: {dict(response.headers)}")
+            
+            if response.status == 200:
+                # Stream straight to disk so memory stays at one chunk
+                size = 0
+                head = b""
+                with open("test_lmnt_output.mp3", "wb") as f:
+                    async for chunk in response.content.iter_chunked(1 << 16):
+                        if not head:
+                            head = chunk[:20]
+                        f.write(chunk)
+                        size += len(chunk)
+                print(f"✅ Success! Audio data received: {size} bytes")
+                print(f"💾 Audio saved to: test_lmnt_output.mp3")
                 
-                if response.status == 200:
-                    audio_data = await response.read()
-                    print(f"✅ Success! Audio data received: {len(audio_data)} bytes")
-                    
-                    # Save test audio
-                    with open("test_lmnt_output.wav", "wb") as f:
-                        f.write(audio_data)
-                    print(f"💾 Audio saved to: test_lmnt_output.wav")
-                    
-                    # Check if it's valid WAV
-                    if audio_data[:4] == b'RIFF':
-                        print(f"✅ Valid WAV file detected")
-                    else:
-                        print(f"⚠️ Data doesn't start with WAV header")
-                        print(f"First 20 bytes: {audio_data[:20]}")
-                    
+                # Check if it's valid MP3 (ID3 tag or a frame sync word)
+                if head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+                    print(f"✅ Valid MP3 file detected")
+                    # Downstream composition expects WAV
+                    if await _mp3_to_wav("test_lmnt_output.mp3", "test_lmnt_output.wav"):
+                        print(f"💾 Decoded WAV saved to: test_lmnt_output.wav")
+                    elif os.path.exists("test_lmnt_output.wav"):
+                        # Don't let other test scripts pick up audio from an earlier run
+                        os.remove("test_lmnt_output.wav")
+                        print(f"⚠️ Removed stale test_lmnt_output.wav; scripts that read it have no audio until the MP3 is decoded")
                 else:
-                    error_text = await response.text()
-                    print(f"❌ API Error: {error_text}")
-                    
-        except Exception as e:
-            print(f"❌ Connection error: {e}")
-            print(f"Error type: {type(e).__name__}")
+                    print(f"⚠️ Data doesn't start with an MP3 header")
+                    print(f"First 20 bytes: {head}")
+                
+            else:
+                error_text = await response.text()
+                print(f"❌ API Error: {error_text}")
+                
+    except Exception as e:
+        print(f"❌ Connection error: {e}")
+        print(f"Error type: {type(e).__name__}")
 
 async def test_lmnt_voices():
     """Test available voices"""
@@ -83,29 +124,37 @@ async def test_lmnt_voices():
     
     print("\n🎤 Checking available voices...")
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                "https://api.lmnt.com/v1/ai/voices",
-                headers=headers
-            ) as response:
-                if response.status == 200:
-                    voices = await response.json()
-                    print(f"✅ Available voices:")
-                    for voice in voices[:5]:  # Show first 5
-                        print(f"   - {voice}")
-                else:
-                    print(f"❌ Could not fetch voices: {response.status}")
-        except Exception as e:
-            print(f"❌ Error fetching voices: {e}")
+    session = await _session()
+    try:
+        async with session.get(
+            "https://api.lmnt.com/v1/ai/voices",
+            headers=headers
+        ) as response:
+            if response.status == 200:
+                voices = await response.json()
+                print(f"✅ Available voices:")
+                for voice in voices[:5]:  # Show first 5
+                    print(f"   - {voice}")
+            else:
+                print(f"❌ Could not fetch voices: {response.status}")
+    except Exception as e:
+        print(f"❌ Error fetching voices: {e}")
+
+async def run_probes():
+    """Run the API and voice probes on one event loop so they share a session"""
+    try:
+        await test_lmnt_api()
+        await test_lmnt_voices()
+    finally:
+        if _SESSION is not None:
+            await _SESSION.close()
 
 def main():
     print("🔍 LMNT API Diagnostic Test")
     print("=" * 40)
     
     # Run the test
-    asyncio.run(test_lmnt_api())
-    asyncio.run(test_lmnt_voices())
+    asyncio.run(run_probes())
     
     print("\n🎯 Next Steps:")
     print("1. If API works, the issue is in the integration")